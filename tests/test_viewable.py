@@ -0,0 +1,274 @@
+import unittest
+import tkinter as tk
+import viewable
+from viewable import Viewable, Lifecycle, NEW, BUILT, error
+
+
+class View(Viewable):
+    def __init__(self, master):
+        super().__init__()
+        self._master = master
+
+    def _build(self):
+        self._body = tk.Frame(self._master)
+
+
+class BodilessView(Viewable):
+    def _build(self):
+        pass
+
+
+class TkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display available")
+
+    def tearDown(self):
+        self.root.destroy()
+
+
+class TestBuild(TkTestCase):
+
+    def test_body_set_in_build(self):
+        view = View(self.root)
+        body = view.build(self.root)
+        self.assertIsInstance(body, tk.Frame)
+        self.assertIs(body, view.body)
+        # no other Frame is created for the view
+        self.assertEqual([body], self.root.winfo_children())
+
+    def test_body_created_by_create_body(self):
+        bodies = []
+
+        class CreatedBodyView(Viewable):
+            def _create_body(self, parent):
+                return tk.Frame(parent)
+
+            def _build(self):
+                # the body already exists here
+                bodies.append(self.body)
+
+        view = CreatedBodyView()
+        body = view.build(self.root)
+        self.assertIsInstance(body, tk.Frame)
+        self.assertIs(self.root, body.master)
+        self.assertEqual([body], bodies)
+        self.assertIs(body, view.body)
+
+
+class TestHooks(TkTestCase):
+
+    def get_bound_sequences(self, body):
+        # the private bindtag of the lifecycle comes first
+        return set(body.bind_class(body.bindtags()[0]))
+
+    def test_view_without_hooks_only_binds_destroy(self):
+        view = View(self.root)
+        body = view.build()
+        self.assertEqual({"<Destroy>"}, self.get_bound_sequences(body))
+
+    def test_view_with_on_map_binds_map(self):
+        class MapView(View):
+            def _on_map(self):
+                pass
+
+        body = MapView(self.root).build()
+        self.assertEqual({"<Map>", "<Destroy>"},
+                         self.get_bound_sequences(body))
+
+
+class TestBuildPackMany(TkTestCase):
+
+    def test_bodies_are_packed_in_order_with_shared_options(self):
+        views = [View(self.root) for _ in range(3)]
+        bodies = Viewable.build_pack_many(views, side=tk.LEFT, padx=2)
+        self.assertEqual([view.body for view in views], bodies)
+        self.assertEqual(bodies, self.root.pack_slaves())
+        for body in bodies:
+            info = body.pack_info()
+            self.assertEqual("left", str(info["side"]))
+            self.assertEqual(2, int(info["padx"]))
+
+    def test_single_trailing_underscore_is_stripped(self):
+        container = tk.Frame(self.root)
+        bodies = Viewable.build_pack_many([View(self.root)], in_=container)
+        self.assertEqual(str(container), str(bodies[0].pack_info()["in"]))
+
+    def test_cnf_is_merged_with_keyword_options(self):
+        views = [View(self.root) for _ in range(2)]
+        bodies = Viewable.build_pack_many(views, cnf={"fill": tk.X},
+                                          side=tk.TOP)
+        for body in bodies:
+            info = body.pack_info()
+            self.assertEqual("x", str(info["fill"]))
+            self.assertEqual("top", str(info["side"]))
+
+
+class TestBuildPackManyArguments(unittest.TestCase):
+
+    def test_no_views(self):
+        self.assertEqual([], Viewable.build_pack_many([]))
+
+    def test_view_without_body_raises_error(self):
+        with self.assertRaises(error.Error):
+            Viewable.build_pack_many([BodilessView()])
+
+    def test_build_methods_raise_error_for_view_without_body(self):
+        for method in ("build_pack", "build_grid",
+                       "build_place", "build_wait"):
+            with self.assertRaises(error.Error):
+                getattr(BodilessView(), method)()
+
+
+class RecordingView(View):
+    def __init__(self, master):
+        super().__init__(master)
+        self.events = []
+
+    def _build(self):
+        super()._build()
+        self.child = tk.Label(self._body, text="child")
+        self.child.pack()
+
+    def _on_map(self):
+        self.events.append("map")
+
+    def _on_remap(self):
+        self.events.append("remap")
+
+    def _on_unmap(self):
+        self.events.append("unmap")
+
+    def _on_destroy(self):
+        self.events.append("destroy")
+
+
+class SelfUnregisteringLifecycle(Lifecycle):
+    """ Unregisters itself from inside the dispatch command """
+
+    def __init__(self, body):
+        super().__init__(body)
+        self.events = []
+
+    def _dispatch(self, kind):
+        viewable._unregister_lifecycle(self)
+        self.events.append(kind)
+
+
+class TestDispatchCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.interp = tk.Tcl()
+
+    def tearDown(self):
+        viewable._LIFECYCLES.pop(self.interp.tk, None)
+
+    def command_exists(self):
+        return bool(self.interp.tk.call("info", "commands",
+                                        viewable._DISPATCH_COMMAND))
+
+    def dispatch(self, lifecycle, kind):
+        self.interp.tk.call(viewable._DISPATCH_COMMAND,
+                            lifecycle._bindtag, kind)
+
+    def test_command_lifetime(self):
+        self.assertFalse(self.command_exists())
+        lifecycle = SelfUnregisteringLifecycle(self.interp)
+        viewable._register_lifecycle(lifecycle)
+        self.assertTrue(self.command_exists())
+        # the command deletes itself while running, and returns normally
+        self.dispatch(lifecycle, "destroy")
+        self.assertEqual(["destroy"], lifecycle.events)
+        self.assertFalse(self.command_exists())
+        self.assertNotIn(self.interp.tk, viewable._LIFECYCLES)
+        # a later registration creates the command again
+        other = SelfUnregisteringLifecycle(self.interp)
+        viewable._register_lifecycle(other)
+        self.assertTrue(self.command_exists())
+        self.dispatch(other, "map")
+        self.assertEqual(["map"], other.events)
+
+    def test_unknown_bindtag_is_ignored(self):
+        lifecycle = SelfUnregisteringLifecycle(self.interp)
+        viewable._register_lifecycle(lifecycle)
+        self.interp.tk.call(viewable._DISPATCH_COMMAND, "unknown", "map")
+        self.assertEqual([], lifecycle.events)
+
+
+class TestLifecycleEvents(TkTestCase):
+
+    def test_hooks_fire_for_the_body_only(self):
+        view = RecordingView(self.root)
+        body = view.build_pack()
+        self.root.update()
+        body.pack_forget()
+        self.root.update()
+        body.pack()
+        self.root.update()
+        # events of the child widget don't reach the hooks
+        view.child.pack_forget()
+        self.root.update()
+        view.child.destroy()
+        self.root.update()
+        self.assertEqual(["map", "unmap", "remap"], view.events)
+        body.destroy()
+        self.assertEqual(["map", "unmap", "remap", "destroy"], view.events)
+
+    def test_registry_is_empty_after_destroy(self):
+        body = RecordingView(self.root).build_pack()
+        self.assertIn(self.root.tk, viewable._LIFECYCLES)
+        body.destroy()
+        self.assertNotIn(self.root.tk, viewable._LIFECYCLES)
+
+    def test_private_bindtag_is_removed_on_deactivate(self):
+        body = tk.Frame(self.root)
+        lifecycle = Lifecycle(body, on_map=lambda: None)
+        self.assertTrue(lifecycle.activate())
+        self.assertIn(lifecycle._bindtag, body.bindtags())
+        self.assertTrue(lifecycle.deactivate())
+        self.assertNotIn(lifecycle._bindtag, body.bindtags())
+        self.assertNotIn(self.root.tk, viewable._LIFECYCLES)
+
+
+class TestLifecycleSequences(unittest.TestCase):
+
+    def setUp(self):
+        # a Tcl interpreter without Tk is enough to build a Lifecycle
+        self.interp = tk.Tcl()
+
+    def test_only_events_with_callbacks_are_bound(self):
+        lifecycle = Lifecycle(self.interp, on_unmap=lambda: None)
+        self.assertEqual((("<Unmap>", "unmap"), ("<Destroy>", "destroy")),
+                         lifecycle._get_sequences())
+
+    def test_map_is_bound_for_on_remap_alone(self):
+        lifecycle = Lifecycle(self.interp, on_remap=lambda: None)
+        self.assertEqual((("<Map>", "map"), ("<Destroy>", "destroy")),
+                         lifecycle._get_sequences())
+
+    def test_destroy_is_always_bound(self):
+        lifecycle = Lifecycle(self.interp)
+        self.assertEqual((("<Destroy>", "destroy"),),
+                         lifecycle._get_sequences())
+
+
+class TestState(unittest.TestCase):
+
+    def test_state_of_a_new_view(self):
+        view = BodilessView()
+        self.assertEqual(NEW, view.state)
+        self.assertEqual(0, view.state)
+        self.assertEqual("new", str(view.state))
+
+    def test_state_of_a_built_view(self):
+        view = BodilessView()
+        view.build()
+        self.assertEqual(BUILT, view.state)
+        self.assertEqual("built", str(view.state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,39 @@
+import enum
+import functools
 import tkinter as tk
 from viewable import error
 
 
-__all__ = ["Viewable"]
+__all__ = ["Viewable", "State", "NEW", "BUILT", "MAPPED", "DESTROYED"]
+
+
+class State(enum.IntEnum):
+    """
+    States of a view. They compare as plain ints, and print
+    as 'new', 'built', 'mapped' and 'destroyed'.
+    """
+    NEW = 0
+    BUILT = 1
+    MAPPED = 2
+    DESTROYED = 3
+
+    def __str__(self):
+        return self.name.lower()
+
+
+NEW = State.NEW
+BUILT = State.BUILT
+MAPPED = State.MAPPED
+DESTROYED = State.DESTROYED
+
+
+# Tcl namespace of this library and name of the command
+# shared by all lifecycles of an interpreter
+_TCL_NAMESPACE = "::viewable"
+_DISPATCH_COMMAND = _TCL_NAMESPACE + "::dispatch"
+
+# Tcl interpreter -> {bindtag: Lifecycle}
+_LIFECYCLES = {}
 
 
 class Viewable:
@@ -22,7 +53,8 @@ class Viewable:
     - You need to implement the methods '_build()', and optionally
         implement '_on_map()' and '_on_destroy()'.
     - You need to set an instance variable '_body' with either a tk.Frame or tk.Toplevel
-        in the method '_on_build()'
+        in the method '_build()', or implement '_create_body(parent)' to return it
+        (the body then already exists when '_build()' is called)
     That's all ! Of course, when you are ready to use the view, just call the 'build()' method.
     Calling the 'build()' method will return the body of the view. The one that you assigned
     to the instance variable '_body'. The same body can be retrieved with the property 'body'.
@@ -42,9 +74,11 @@ class Viewable:
       to build and pack/grid/place your widget in the master !!
       Use "build_wait" for toplevels if you want the app to wait till the window closes
     """
+    __slots__ = ("_body", "__state")
+
     def __init__(self):
-        self.__body = None
-        self.__built = False
+        self._body = None
+        self.__state = NEW
 
     # ======== PROPERTIES ========
 
@@ -53,88 +87,151 @@ class Viewable:
         """
         Get the body of this view.
         """
-        return self.__body
+        return self._body
+
+    @property
+    def state(self):
+        """
+        Get the state of this view: NEW, BUILT, MAPPED or DESTROYED.
+        Map events aren't tracked for this property (they are only bound
+        for the '_on_map()' family of methods). So on a built view, each
+        read is a live query to Tk (winfo_ismapped) that reports MAPPED
+        while the body is mapped.
+        """
+        state = self.__state
+        if (state == BUILT and self._body is not None
+                and self._body.winfo_ismapped()):
+            return MAPPED
+        return state
 
     # ======== PUBLIC METHOD =======
 
-    def build(self, parent):
-        """ Build this view """
-        if self.__built:
-            return self.body
-        body = self._create_body(parent)
-        self.__body = body
-        if body:
-            implement_lifecycle(body,
-                                on_map=self._on_map,
-                                on_remap=self._on_remap,
-                                on_unmap=self._on_unmap,
-                                on_destroy=self._on_destroy)
-        self._build()
-        self.__built = True
-        return body
+    def build(self, parent=None):
+        """ Build this view. The 'parent' is only passed to '_create_body()' """
+        if self.__state != NEW:
+            return self._body
+        if self._create_body is None:
+            # '_build()' sets the body
+            self._build()
+            self.__implement_lifecycle()
+        else:
+            self._body = self._create_body(parent)
+            self.__implement_lifecycle()
+            self._build()
+        self.__state = BUILT
+        return self._body
 
-    def build_pack(self, parent, cnf=None, **kwargs):
+    def build_pack(self, parent=None, cnf=None, **kwargs):
         """ Build this view then pack it """
-        self.build(parent)
-        cnf = {} if not cnf else cnf
-        self.body.pack(cnf=cnf, **kwargs)
-        return self.body
+        body = self.__build_body(parent)
+        if cnf:
+            body.pack(cnf=cnf, **kwargs)
+        elif kwargs:
+            body.pack(**kwargs)
+        else:
+            body.pack()
+        return body
 
-    def build_grid(self, parent, cnf=None, **kwargs):
+    def build_grid(self, parent=None, cnf=None, **kwargs):
         """ Build this view then grid it """
-        self.build(parent)
-        cnf = {} if not cnf else cnf
-        self.body.grid(cnf=cnf, **kwargs)
-        return self.body
+        body = self.__build_body(parent)
+        if cnf:
+            body.grid(cnf=cnf, **kwargs)
+        elif kwargs:
+            body.grid(**kwargs)
+        else:
+            body.grid()
+        return body
 
-    def build_place(self, parent, cnf=None, **kwargs):
+    def build_place(self, parent=None, cnf=None, **kwargs):
         """ Build this view then place it """
-        self.build(parent)
-        cnf = {} if not cnf else cnf
-        self.body.place(cnf=cnf, **kwargs)
-        return self.body
+        body = self.__build_body(parent)
+        if cnf:
+            body.place(cnf=cnf, **kwargs)
+        elif kwargs:
+            body.place(**kwargs)
+        else:
+            body.place()
+        return body
 
-    def build_wait(self, parent):
+    @staticmethod
+    def build_pack_many(views, parent=None, cnf=None, **kwargs):
+        """ Build these views then pack them, in order, with the same
+         options. The options have the same format as for 'pack()'.
+         A single 'pack configure' is issued for all the bodies.
+         Return the list of bodies """
+        bodies = []
+        for view in views:
+            bodies.append(view.__build_body(parent))
+        if not bodies:
+            return bodies
+        options = []
+        for key, value in dict(cnf or {}, **kwargs).items():
+            if value is not None:
+                key = key[:-1] if key.endswith("_") else key
+                options.extend(("-" + key, value))
+        # Tcl gets the path names of the bodies from str()
+        bodies[0].tk.call("pack", "configure", *(bodies + options))
+        return bodies
+
+    def build_wait(self, parent=None):
         """ Build this view then wait till it closes.
          The view should have a tk.Toplevel as body """
-        self.build(parent)
-        if self.body.winfo_exists():
-            self.body.wait_window(self.body)
-        return self.body
+        body = self.__build_body(parent)
+        try:
+            body.wait_window(body)
+        except tk.TclError:
+            # the body is already destroyed
+            pass
+        return body
 
-    # ======= METHODS TO IMPLEMENT ========
-    def _create_body(self, parent):
-        return tk.Frame(parent)
+    # ======= INTERNAL =======
 
-    def _build(self):
-        """
-        Build the view layout here
-        """
-        pass
+    def __build_body(self, parent):
+        """ Build this view and return its body, which the build_*
+        methods can't do without """
+        body = self.build(parent)
+        if body is None:
+            raise error.Error("This view has no body: {}".format(self))
+        return body
 
-    def _on_map(self):
-        """
-        Put here the code that will be executed when
-        the body is mapped.
-        """
-        pass
+    def __implement_lifecycle(self):
+        if self._body:
+            implement_lifecycle(self._body,
+                                on_map=self._on_map,
+                                on_remap=self._on_remap,
+                                on_unmap=self._on_unmap,
+                                on_destroy=self.__run_on_destroy)
 
-    def _on_remap(self):
-        pass
+    def __run_on_destroy(self):
+        self.__state = DESTROYED
+        on_destroy = self._on_destroy
+        if on_destroy is not None:
+            on_destroy()
 
-    def _on_unmap(self):
-        """
-        Put here the code that will be executed when
-        the body is unmapped.
-        """
-        pass
+    # ======= METHODS TO IMPLEMENT ========
+
+    # Implement '_create_body(self, parent)' to create and return
+    # the body before '_build()' is called. By default, '_build()'
+    # sets the body itself and no throwaway tk.Frame is created.
+    _create_body = None
 
-    def _on_destroy(self):
+    def _build(self):
         """
-        Put here the code that will be executed at destroy event
+        Build the view layout here
         """
         pass
 
+    # Implement the following methods to run code when the body
+    # is mapped for the first time ('_on_map(self)'), mapped again
+    # ('_on_remap(self)'), unmapped ('_on_unmap(self)') or destroyed
+    # ('_on_destroy(self)'). The events of the ones left to None
+    # aren't bound at all.
+    _on_map = None
+    _on_remap = None
+    _on_unmap = None
+    _on_destroy = None
+
 
 def implement_lifecycle(body, on_map=None, on_remap=None, on_unmap=None,
                         on_destroy=None):
@@ -146,6 +243,8 @@ def implement_lifecycle(body, on_map=None, on_remap=None, on_unmap=None,
     - on_map: callback to be called on map
     - on_unmap: callback to be called on unmap
     - on_destroy: callback to be called on destroy
+
+    An event whose callbacks are all None isn't bound at all.
     """
     lifecycle = Lifecycle(body, on_map=on_map, on_remap=on_remap,
                           on_unmap=on_unmap, on_destroy=on_destroy)
@@ -153,6 +252,10 @@ def implement_lifecycle(body, on_map=None, on_remap=None, on_unmap=None,
 
 
 class Lifecycle:
+    __slots__ = ("_body", "_master", "_on_map", "_on_remap", "_on_unmap",
+                 "_on_destroy", "_sequences", "_bindtag",
+                 "_previously_mapped", "_active")
+
     def __init__(self, body, on_map=None, on_remap=None, on_unmap=None,
                  on_destroy=None):
         self._body = body
@@ -161,9 +264,8 @@ class Lifecycle:
         self._on_remap = on_remap
         self._on_unmap = on_unmap
         self._on_destroy = on_destroy
-        self._bind_map_id = None
-        self._bind_unmap_id = None
-        self._bind_destroy_id = None
+        self._sequences = ()
+        self._bindtag = "ViewableBody%d" % id(self)
         self._previously_mapped = False
         self._active = False
 
@@ -192,69 +294,154 @@ class Lifecycle:
         return self._active
 
     def activate(self):
-        if not self._body.winfo_exists():
+        if self._body is None:
+            return False
+        # no winfo_exists() probe: binding a destroyed body
+        # fails on its first Tcl call
+        try:
+            self._bind()
+        except tk.TclError:
             return False
-        self._bind()
         self._active = True
         return True
 
     def deactivate(self):
-        if not self._body.winfo_exists():
+        if self._body is None:
             return False
-        self._unbind()
-        self._active = False
+        try:
+            self._unbind()
+        except tk.TclError:
+            return False
+        finally:
+            self._active = False
         return True
 
     def _bind(self):
-        self._bind_map_event()
-        self._bind_unmap_event()
-        self._bind_destroy_event()
-
-    def _unbind(self):
-        bind_ids = {self._bind_map_id: "<Map>",
-                    self._bind_unmap_id: "<Unmap>",
-                    self._bind_destroy_id: "<Destroy>"}
-        for bind_id, item in bind_ids.items():
-            self._body.unbind(item, bind_id)
-        self._bind_map_id = None
-        self._bind_unmap_id = None
-        self._bind_destroy_id = None
-
-    def _bind_map_event(self):
-        self._bind_map_id = self._body.bind("<Map>", self._handle_map_event, True)
-
-    def _bind_unmap_event(self):
-        self._bind_unmap_id = self._body.bind("<Unmap>", self._handle_unmap_event, True)
-
-    def _bind_destroy_event(self):
-        command = (lambda event: self._handle_destroy_event(event)
-                   if event.widget is self._body else None)
-        self._bind_destroy_id = self._body.bind("<Destroy>", command, True)
-
-    def _handle_map_event(self, event):
-        if event.widget is not self._body:
+        # the private bindtag is only added to the body itself,
+        # so events of its descendants never reach our handlers
+        self._body.bindtags((self._bindtag,) + self._body.bindtags())
+        # the lifecycle events are dispatched by a Tcl command
+        # shared by all the lifecycles of the interpreter
+        _register_lifecycle(self)
+        self._sequences = self._get_sequences()
+        for sequence, kind in self._sequences:
+            self._body.tk.call("bind", self._bindtag, sequence,
+                               "%s %s %s" % (_DISPATCH_COMMAND,
+                                             self._bindtag, kind))
+
+    def _unbind(self, destroyed=False):
+        if not self._sequences:
             return
+        # bindings of a bindtag outlive the widgets carrying it
+        for sequence, _ in self._sequences:
+            self._body.tk.call("bind", self._bindtag, sequence, "")
+        self._sequences = ()
+        _unregister_lifecycle(self)
+        # Tk drops the bindtags list of a destroyed widget by itself
+        if destroyed:
+            return
+        bindtags = self._body.bindtags()
+        if self._bindtag in bindtags:
+            self._body.bindtags(tuple(tag for tag in bindtags
+                                      if tag != self._bindtag))
+
+    def _get_sequences(self):
+        sequences = []
+        if self._on_map is not None or self._on_remap is not None:
+            sequences.append(("<Map>", "map"))
+        if self._on_unmap is not None:
+            sequences.append(("<Unmap>", "unmap"))
+        # <Destroy> is always bound to clean up and restore the focus
+        sequences.append(("<Destroy>", "destroy"))
+        return tuple(sequences)
+
+    def _dispatch(self, kind):
+        if kind == "map":
+            self._handle_map_event()
+        elif kind == "unmap":
+            self._handle_unmap_event()
+        else:
+            self._handle_destroy_event()
+
+    def _handle_map_event(self):
         if self._previously_mapped:
-            self._on_remap()
+            if self._on_remap is not None:
+                self._on_remap()
         else:
-            self._on_map()
+            if self._on_map is not None:
+                self._on_map()
             self._previously_mapped = True
-        return
 
-    def _handle_unmap_event(self, event):
-        if event.widget is not self._body:
-            return
-        self._on_unmap()
+    def _handle_unmap_event(self):
+        if self._on_unmap is not None:
+            self._on_unmap()
 
-    def _handle_destroy_event(self, event):
-        if event.widget is not self._body:
-            return
-        self._unbind()
-        self._on_destroy()
+    def _handle_destroy_event(self):
+        self._unbind(destroyed=True)
+        if self._on_destroy is not None:
+            self._on_destroy()
         self._previously_mapped = False
         self._active = False
+        self._restore_focus()
+        # the lifecycle is over: release the widgets and the callbacks
+        # (often bound methods of a view) without waiting for the GC
+        self._body = self._master = None
+        self._on_map = self._on_remap = None
+        self._on_unmap = self._on_destroy = None
+
+    def _restore_focus(self):
+        # nothing to focus back when the master is gone or is itself
+        # being destroyed (Tk reports a dying window as nonexistent)
+        if self._master is None:
+            return
         try:
-            if self._master.focus_get() is None:
-                self._master.winfo_toplevel().focus_lastfor().focus_force()
-        except Exception as e:
-            pass
+            exists = self._master.winfo_exists()
+        except tk.TclError:
+            return
+        if not exists:
+            return
+        # raw Tcl calls: no widget lookup for paths tkinter doesn't know
+        tk_call = self._master.tk.call
+        focus = tk_call("focus")
+        if focus and focus != "none":
+            return
+        toplevel = tk_call("winfo", "toplevel", str(self._master))
+        tk_call("focus", "-force", tk_call("focus", "-lastfor", toplevel))
+
+
+def _register_lifecycle(lifecycle):
+    """
+    Register the lifecycle to the dispatch command of its interpreter.
+    The command is created on first use
+    """
+    body = lifecycle.body
+    lifecycles = _LIFECYCLES.get(body.tk)
+    if lifecycles is None:
+        lifecycles = _LIFECYCLES[body.tk] = {}
+        dispatcher = functools.partial(_dispatch, lifecycles)
+        body.tk.call("namespace", "eval", _TCL_NAMESPACE, "")
+        body.tk.createcommand(_DISPATCH_COMMAND,
+                              tk.CallWrapper(dispatcher, None,
+                                             body).__call__)
+    lifecycles[lifecycle._bindtag] = lifecycle
+
+
+def _unregister_lifecycle(lifecycle):
+    """
+    Unregister the lifecycle. The dispatch command is deleted
+    with the last lifecycle of its interpreter
+    """
+    interp = lifecycle.body.tk
+    lifecycles = _LIFECYCLES.get(interp)
+    if lifecycles is None:
+        return
+    lifecycles.pop(lifecycle._bindtag, None)
+    if not lifecycles:
+        del _LIFECYCLES[interp]
+        interp.deletecommand(_DISPATCH_COMMAND)
+
+
+def _dispatch(lifecycles, bindtag, kind):
+    lifecycle = lifecycles.get(bindtag)
+    if lifecycle is not None:
+        lifecycle._dispatch(kind)